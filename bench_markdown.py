@@ -0,0 +1,141 @@
+import sys
+import time
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from mudang_GPT import MarkdownRenderer
+
+# 벤치마크 설정 - 스트리밍 조각 크기와 목표 문서 길이
+CHUNK_SIZE = 20
+TARGET_LENGTH = 15000
+REPORT_EVERY = 2500
+
+SAMPLE_SECTION = """## {index}. 사주팔자 풀이 🔮
+
+와~ 이 부분은 정말 흥미로운 기운이 느껴지네요! 오행을 보면 목(木)과 화(火)가 **강하게** 들어와 있어요.
+
+- 건강: 봄철 환절기에 기관지를 조심하세요
+- 금전: 음~ 하반기에 들어오는 재물운이 좋아요
+- 사랑: 귀인이 동쪽에서 다가오고 있어요
+
+1. 아침마다 따뜻한 물을 드세요
+2. 붉은색 소품이 길운을 불러요
+
+### 올해의 달별 흐름
+
+1. 1월에는 새로운 인연이 찾아와요
+
+   특히 보름 무렵을 눈여겨보세요
+
+2. 3월에는 이사나 이직운이 들어와요
+
+3. 9월에는 건강을 챙기세요
+
+2025년은 전체적으로 상승하는 흐름이에요.
+
+```
+# 부적 쓰는 법
+
+붉은 글씨로 이름을 적어요
+```
+
+> 후~ 마음을 편하게 가지세요
+
+---
+
+"""
+
+# 풀이 전체가 하나의 느슨한 목록인 경우 (항목 본문은 번호 길이만큼 들여씀)
+LIST_SECTION = """{index}. **{index}번째 파트** 🔮
+
+{pad}와~ 이 부분은 정말 흥미로운 기운이 느껴지네요! 오행을 보면 목(木)과 화(火)가 **강하게** 들어와 있어요.
+
+{pad}- 건강: 봄철 환절기에 기관지를 조심하세요
+{pad}- 금전: 음~ 하반기에 들어오는 재물운이 좋아요
+
+{pad}후~ 마음을 편하게 가지면 길운이 따라와요.
+
+"""
+
+SAMPLES = {"섹션형": SAMPLE_SECTION, "목록형": LIST_SECTION}
+
+# 렌더링 결과를 setMarkdown과 비교할 조각 크기
+CHECK_CHUNK_SIZES = [1, 2, 3, 7, 20, 64]
+
+
+def sample_reading(template, length):
+    """template을 반복해 length 이상의 길이를 가진 예시 사주 풀이 생성"""
+    parts = []
+    total = 0
+    index = 1
+    while total < length:
+        section = template.format(index=index, pad=" " * len(f"{index}. "))
+        parts.append(section)
+        total += len(section)
+        index += 1
+    return "".join(parts)
+
+
+def run(text_edit, update, text):
+    """조각 단위로 update를 호출하며 문서 길이 구간별 평균 갱신 시간(ms) 측정"""
+    timings = {}
+    for end in range(CHUNK_SIZE, len(text) + CHUNK_SIZE, CHUNK_SIZE):
+        start = time.perf_counter()
+        update(text, end)
+        # 레이아웃까지 포함해 측정
+        text_edit.document().documentLayout().documentSize()
+        elapsed = (time.perf_counter() - start) * 1000
+        bucket = min(end, len(text)) // REPORT_EVERY * REPORT_EVERY
+        timings.setdefault(bucket, []).append(elapsed)
+    return {bucket: sum(values) / len(values) for bucket, values in timings.items()}
+
+
+def check_matches_set_markdown(text):
+    """여러 조각 크기로 렌더링한 결과가 setMarkdown과 같은지 확인하고 다른 조각 크기 목록 반환"""
+    expected = QTextEdit()
+    expected.setMarkdown(text)
+    mismatched = []
+    for chunk_size in CHECK_CHUNK_SIZES:
+        text_edit = QTextEdit()
+        renderer = MarkdownRenderer(text_edit)
+        for start in range(0, len(text), chunk_size):
+            renderer.append(text[start:start + chunk_size])
+        renderer.finish()
+        if text_edit.document().toHtml() != expected.document().toHtml():
+            mismatched.append(chunk_size)
+    return mismatched
+
+
+def main():
+    app = QApplication(sys.argv)
+
+    # 조각이 나뉘는 위치와 상관없이 같은 문서가 되는지 먼저 확인
+    for name, template in SAMPLES.items():
+        mismatched = check_matches_set_markdown(sample_reading(template, REPORT_EVERY * 2))
+        if mismatched:
+            print(f"{name}: setMarkdown과 결과가 다름 (조각 크기: {mismatched})")
+            sys.exit(1)
+
+    for name, template in SAMPLES.items():
+        text = sample_reading(template, TARGET_LENGTH)
+
+        # 매번 전체 문서를 setMarkdown으로 다시 그리는 방식
+        naive_edit = QTextEdit()
+        naive_edit.resize(800, 600)
+        naive = run(naive_edit, lambda text, end: naive_edit.setMarkdown(text[:end]), text)
+
+        # 마지막 블록만 다시 그리는 점진적 렌더러
+        incremental_edit = QTextEdit()
+        incremental_edit.resize(800, 600)
+        renderer = MarkdownRenderer(incremental_edit)
+        incremental = run(incremental_edit,
+                          lambda text, end: renderer.append(text[end - CHUNK_SIZE:end]), text)
+
+        print(f"[{name}]")
+        print(f"{'문서 길이':>12} {'setMarkdown(ms)':>16} {'MarkdownRenderer(ms)':>21}")
+        for bucket in sorted(naive):
+            label = f"{bucket}~{bucket + REPORT_EVERY}"
+            print(f"{label:>12} {naive[bucket]:>16.3f} {incremental[bucket]:>21.3f}")
+
+
+if __name__ == '__main__':
+    main()
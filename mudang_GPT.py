@@ -1,19 +1,39 @@
 import sys
 import os
 import json
+import re
+import html
+import math
+import multiprocessing
 import anthropic
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                             QLabel, QLineEdit, QPushButton, QTextEdit, 
                             QTabWidget, QHBoxLayout, QMessageBox, QFormLayout,
-                            QRadioButton, QButtonGroup)
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont, QColor, QPalette
+                            QRadioButton, QButtonGroup, QFileDialog)
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
+from PyQt5.QtGui import (QFont, QColor, QPalette, QTextCursor, QTextDocument,
+                         QTextDocumentFragment, QTextFormat, QGuiApplication, QPdfWriter,
+                         QPageSize)
 
 # API 키 설정 - 실제 사용 시에는 환경 변수나 설정 파일에서 불러오는 것이 좋습니다
 ANTHROPIC_API_KEY = "YOUR_ANTHROPIC_API_KEY"
 AI_MODEL = "claude-3-7-sonnet-20250219"  # Claude 3.7 Sonnet 모델
 
+# 지난 풀이를 보관하는 폴더
+READINGS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "readings")
+
+# 출력 토큰 예산 설정 - 지난 응답 길이의 분포로 max_tokens를 정함
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "output_budget.json")
+BUDGET_PERCENTILE = 90  # 지난 응답 길이 중 이 백분위수를 max_tokens로 사용
+BUDGET_DEFAULT_TOKENS = 2000  # 기록이 충분히 쌓이기 전 기본값
+BUDGET_MIN_SAMPLES = 10
+BUDGET_HISTORY_SIZE = 200  # 모드별로 보관할 최근 응답 수
+BUDGET_MIN_TOKENS = 256
+BUDGET_MAX_TOKENS = 8192
+MAX_CONTINUATIONS = 3  # max_tokens로 잘렸을 때 이어서 생성하는 최대 횟수
+
 # 프로그램 설정 및 프롬프트 기본값
 DEFAULT_SETTINGS = {
     "saju_prompt": """
@@ -108,10 +128,435 @@ QRadioButton::indicator:unchecked {
 }
 """
 
+# 내보내기(HTML/PDF) 문서 스타일 - GLOBAL_STYLE과 같은 색상 사용
+EXPORT_STYLE = """
+body {
+    background-color: #2D2D30;
+    color: #E0E0E0;
+    font-family: 'Malgun Gothic';
+    font-size: 11pt;
+}
+
+h1 {
+    color: #8E2DC5;
+}
+
+h2, h3 {
+    color: #9D3DD4;
+}
+
+.meta {
+    color: #AAAAAA;
+    font-size: 9pt;
+}
+
+.question {
+    background-color: #1E1E1E;
+    border: 1px solid #555555;
+    padding: 10px;
+}
+"""
+
+KIND_TITLES = {"saju": "사주팔자", "counsel": "고민상담"}
+
+# 마크다운 블록 경계 판단에 쓰는 줄 패턴
+MARKDOWN_HEADING = re.compile(r"#{1,6}(\s|$)")
+MARKDOWN_FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+MARKDOWN_LIST_ITEM = re.compile(r" {0,3}([-*+]|\d{1,9}[.)])(\s|$)")
+MARKDOWN_THEMATIC_BREAK = re.compile(r" {0,3}([-*_])( *\1){2,} *$")
+MARKDOWN_TAIL_LIMIT = 1500  # 느슨한 목록이 이 길이를 넘으면 최상위 항목 앞에서 나눔
+
+
+def find_block_boundary(text):
+    """text에서 앞부분을 독립된 블록으로 확정할 수 있는 마지막 위치와,
+    그 위치가 앞 목록을 이어 가는지 여부를 반환 (나눌 곳이 없으면 (0, False))
+
+    완성된 줄만 보고, 코드 블록 안에서는 나누지 않으며,
+    빈 줄 뒤에 목록 항목이 이어지면 느슨한 목록으로 보고 나누지 않음.
+    단, 확정되지 않은 부분이 MARKDOWN_TAIL_LIMIT보다 길어지면 최상위 목록 항목 앞에서도 나눔
+    (같은 목록이 이어지는 경우 MarkdownRenderer가 앞 목록에 이어 붙여 번호를 유지).
+    코드 블록과 구분선(---)은 조각의 처음이나 끝에 오면 Qt가 서식을 잃으므로 다음 블록과 함께 둠
+    """
+    boundary = 0
+    continues_list = False
+    offset = 0
+    fence = None
+    keep_with_next = False  # 코드 블록이나 구분선 직후에는 나누지 않음
+    list_marker = None  # 열려 있는 최상위 목록의 표시 종류 (-, *, +, ., ))
+    list_indent = 0  # 열려 있는 목록 항목의 본문 들여쓰기
+    list_clean = False  # 목록이 문단을 끊지 않고 시작되어 나눠도 안전한지
+    previous_blank = False
+    previous_paragraph = False  # 이전 줄이 이어질 수 있는 문단 텍스트인지
+    has_content = False
+    for line in text.splitlines(keepends=True):
+        if not line.endswith("\n"):
+            break  # 아직 받는 중인 줄은 판단하지 않음
+
+        fence_match = MARKDOWN_FENCE.match(line)
+        if fence:
+            # 여는 표시와 같은 문자, 같거나 긴 길이의 줄에서만 코드 블록이 닫힘
+            if (fence_match and fence_match.group(1)[0] == fence[0]
+                    and len(fence_match.group(1)) >= len(fence)
+                    and not line[fence_match.end():].strip()):
+                fence = None
+                keep_with_next = True
+            previous_paragraph = False
+        elif MARKDOWN_THEMATIC_BREAK.match(line):
+            keep_with_next = True
+            list_marker = None
+            previous_paragraph = False
+        elif line.strip():
+            indent = len(line) - len(line.lstrip(" "))
+            list_match = MARKDOWN_LIST_ITEM.match(line)
+            # 열린 목록의 본문 들여쓰기보다 덜 들여쓴 항목이면 최상위 목록 항목
+            top_level_item = list_match and (list_marker is None or indent < list_indent)
+            starts_block = (
+                MARKDOWN_HEADING.match(line)
+                or (previous_blank and line[0] not in " \t>" and not list_match
+                    and not fence_match)
+            )
+            splits_list = (previous_blank and top_level_item and indent == 0
+                           and (list_clean or list_marker is None)
+                           and offset - boundary >= MARKDOWN_TAIL_LIMIT)
+            if has_content and (starts_block or splits_list) and not keep_with_next:
+                boundary = offset
+                continues_list = bool(splits_list and list_match.group(1)[-1] == list_marker)
+            keep_with_next = False
+
+            block_start = MARKDOWN_HEADING.match(line) or fence_match or line.lstrip()[0] == ">"
+            if top_level_item:
+                # 문단을 끊고 시작된 목록은 md4c 규칙이 복잡하므로 나누지 않음
+                if list_match.group(1)[-1] != list_marker:
+                    list_clean = not previous_paragraph
+                list_marker = list_match.group(1)[-1]
+                after_marker = line[list_match.end(1):].rstrip("\n")
+                spaces = len(after_marker) - len(after_marker.lstrip(" "))
+                list_indent = list_match.end(1) + (spaces if 1 <= spaces <= 4 else 1)
+            elif indent < list_indent and (previous_blank or block_start):
+                # 본문 들여쓰기에 못 미치는 다른 블록이 오면 목록이 끝남
+                list_marker = None
+                list_indent = 0
+            previous_paragraph = not (MARKDOWN_HEADING.match(line) or fence_match)
+            if fence_match:
+                fence = fence_match.group(1)
+
+        previous_blank = not line.strip()
+        if previous_blank:
+            previous_paragraph = False
+        has_content = has_content or not previous_blank
+        offset += len(line)
+    return boundary, continues_list
+
+
+# 스트리밍되는 마크다운을 QTextEdit에 점진적으로 렌더링
+class MarkdownRenderer:
+    """완성된 블록은 뒤에 이어 붙이고, 마지막 미완성 블록만 다시 렌더링"""
+
+    def __init__(self, text_edit):
+        self.text_edit = text_edit
+        self.clear()
+
+    def clear(self):
+        self.text_edit.clear()
+        self.buffer = ""
+        self.committed = 0  # buffer 중 블록이 확정된 길이
+        self.tail_position = 0  # 문서에서 미완성 블록이 시작되는 위치
+        self.tail_continues_list = False  # 미완성 블록이 앞 목록을 이어 가는지
+
+    def append(self, chunk):
+        """새로 받은 텍스트를 덧붙이고 변경된 부분만 다시 그림"""
+        self.buffer += chunk
+        pending = self.buffer[self.committed:]
+
+        # 마지막 경계까지는 완성된 블록으로 확정
+        boundary, continues_list = find_block_boundary(pending)
+        finished_continues_list = self.tail_continues_list
+        if boundary:
+            self.committed += boundary
+            self.tail_continues_list = continues_list
+        self._render(pending[:boundary], pending[boundary:], finished_continues_list)
+
+    def strip_trailing_whitespace(self):
+        """끝 공백을 지우고 다시 그림 (이어쓰기 prefill과 buffer를 맞춤)"""
+        self.buffer = self.buffer.rstrip()
+        self.committed = min(self.committed, len(self.buffer))
+        self.append("")
+
+    def finish(self):
+        """스트리밍 종료 시 남은 블록을 확정"""
+        self._render(self.buffer[self.committed:], "", self.tail_continues_list)
+        self.committed = len(self.buffer)
+
+    def _render(self, finished, tail, finished_continues_list):
+        scroll_bar = self.text_edit.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum() - 4
+        scroll_value = scroll_bar.value()
+
+        # 위젯 커서가 아닌 별도 커서로 편집해 화면이 튀지 않게 함
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(self.tail_position)
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+
+        if finished.strip():
+            self._insert_markdown(cursor, finished, finished_continues_list)
+            self.tail_position = cursor.position()
+        if tail.strip():
+            self._insert_markdown(cursor, tail, self.tail_continues_list)
+        cursor.endEditBlock()
+
+        scroll_bar.setValue(scroll_bar.maximum() if at_bottom else scroll_value)
+
+    def _insert_markdown(self, cursor, text, continues_list):
+        document = QTextDocument()
+        document.setMarkdown(text)
+
+        first_block = document.firstBlock()
+        first_list = first_block.textList()
+        previous_list = None
+        if continues_list and cursor.position() > 0 and first_list:
+            previous_list = self._previous_list(cursor.block(), first_list)
+
+        # 첫 블록은 현재 블록에 합쳐지므로 제목 등의 블록 서식을 미리 맞춰 둠
+        block_format = first_block.blockFormat()
+        block_format.clearProperty(QTextFormat.ObjectIndex)  # 임시 문서의 목록 번호는 쓰지 않음
+        target_list = None
+        if cursor.position() > 0:
+            cursor.insertBlock(block_format, first_block.charFormat())
+            # 목록으로 시작하는 조각은 현재 블록이 목록에 속해야 빈 블록 없이 합쳐짐.
+            # 목록 중간에서 나뉜 조각이면 앞 목록에 이어 붙여 번호가 이어지게 함
+            if previous_list:
+                target_list = previous_list
+                target_list.add(cursor.block())
+            elif first_list:
+                target_list = cursor.createList(first_list.format())
+        else:
+            cursor.setBlockFormat(first_block.blockFormat())
+            cursor.setBlockCharFormat(first_block.charFormat())
+        start = cursor.position()
+        cursor.insertFragment(QTextDocumentFragment(document))
+
+        if target_list:
+            self._join_first_list(document, self.text_edit.document().findBlock(start),
+                                  target_list)
+
+    def _previous_list(self, block, text_list):
+        # 같은 들여쓰기 단계의 바로 앞 목록 찾기
+        indent = text_list.format().indent()
+        while block.isValid():
+            if block.textList() and block.textList().format().indent() == indent:
+                return block.textList()
+            block = block.previous()
+        return None
+
+    def _join_first_list(self, document, target, target_list):
+        # 조각의 블록은 삽입된 블록과 순서대로 대응하므로, 첫 목록에 속한 블록만 대상 목록으로 옮김
+        first_list = document.firstBlock().textList()
+        source = document.firstBlock().next()
+        target = target.next()
+        while source.isValid() and target.isValid():
+            if (source.textList() and source.textList().objectIndex() == first_list.objectIndex()
+                    and source.text() == target.text()):
+                target_list.add(target)
+            source = source.next()
+            target = target.next()
+
+
+def is_token_count(value):
+    """출력 예산 기록에 쓸 수 있는 0 이상의 정수인지 확인"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+# 모드(사주/상담)별 출력 길이를 학습해 max_tokens를 정하는 예산 관리
+class OutputBudget:
+    """지난 response.usage 기록의 백분위수로 max_tokens를 정하고 잘림 비율을 집계"""
+
+    def __init__(self, path=BUDGET_FILE, percentile=BUDGET_PERCENTILE):
+        self.path = path
+        self.percentile = percentile
+        self.history = {}  # 모드별 전체 출력 토큰 수 (이어쓰기 포함)
+        self.requests = {}
+        self.truncated = {}  # 첫 응답이 max_tokens에서 잘린 횟수
+        self.cut_short = {}  # 이어쓰기를 모두 써도 잘린 채 끝난 횟수
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return  # 형식이 맞지 않는 기록은 무시하고 기본값으로 시작
+
+        # 모드별 값의 형식이 맞는 항목만 사용
+        history = data.get("history")
+        if isinstance(history, dict):
+            self.history = {
+                mode: [n for n in samples if is_token_count(n)]
+                for mode, samples in history.items() if isinstance(samples, list)
+            }
+        for name in ("requests", "truncated", "cut_short"):
+            counts = data.get(name)
+            if isinstance(counts, dict):
+                setattr(self, name, {mode: n for mode, n in counts.items() if is_token_count(n)})
+
+    def save(self):
+        data = {"history": self.history, "requests": self.requests,
+                "truncated": self.truncated, "cut_short": self.cut_short}
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    def max_tokens(self, mode):
+        """mode의 지난 출력 길이 분포에서 설정된 백분위수를 반환"""
+        samples = sorted(self.history.get(mode, []))
+        if len(samples) < BUDGET_MIN_SAMPLES:
+            return BUDGET_DEFAULT_TOKENS
+        # nearest-rank 방식 백분위수
+        rank = max(1, math.ceil(self.percentile / 100 * len(samples)))
+        return min(max(samples[rank - 1], BUDGET_MIN_TOKENS), BUDGET_MAX_TOKENS)
+
+    def record(self, mode, output_tokens, truncated, cut_short):
+        """응답 하나의 출력 토큰 수와 max_tokens 도달 여부, 최종적으로 잘렸는지를 기록"""
+        samples = self.history.setdefault(mode, [])
+        samples.append(output_tokens)
+        del samples[:-BUDGET_HISTORY_SIZE]
+        self.requests[mode] = self.requests.get(mode, 0) + 1
+        self.truncated[mode] = self.truncated.get(mode, 0) + int(truncated)
+        self.cut_short[mode] = self.cut_short.get(mode, 0) + int(cut_short)
+        try:
+            self.save()
+        except OSError:
+            pass  # 기록 저장 실패는 풀이에 영향을 주지 않음
+
+    def truncation_rate(self, mode):
+        """첫 응답이 max_tokens에서 잘린 비율"""
+        requests = self.requests.get(mode, 0)
+        return self.truncated.get(mode, 0) / requests if requests else 0.0
+
+    def cut_short_rate(self, mode):
+        """이어쓰기 후에도 잘린 채 끝난 응답의 비율"""
+        requests = self.requests.get(mode, 0)
+        return self.cut_short.get(mode, 0) / requests if requests else 0.0
+
+
+def archive_reading(kind, info, text):
+    """풀이 결과를 READINGS_DIR에 JSON으로 보관하고 경로 반환"""
+    os.makedirs(READINGS_DIR, exist_ok=True)
+    created_at = datetime.now()
+    reading = dict(info, kind=kind, text=text,
+                   created_at=created_at.isoformat(timespec="seconds"))
+    path = os.path.join(READINGS_DIR, f"{created_at:%Y%m%d_%H%M%S_%f}_{kind}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(reading, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def reading_to_html(reading):
+    """보관된 풀이를 EXPORT_STYLE이 적용된 HTML 문서로 변환"""
+    # 마크다운 본문은 QTextDocument로 변환해 body 내용만 사용
+    markdown = QTextDocument()
+    markdown.setMarkdown(reading["text"])
+    body = re.search(r"<body[^>]*>(.*)</body>", markdown.toHtml(), re.S).group(1)
+
+    title = f"{KIND_TITLES.get(reading['kind'], '')} - {reading['name']}"
+    meta = (f"{reading['gender']} · {reading['birthdate']} {reading['birthtime']}"
+            f" · {reading['created_at']}")
+    question = ""
+    if reading.get("worry"):
+        question = f'<p class="question">{html.escape(reading["worry"])}</p>'
+
+    return f"""<html>
+<head>
+<meta charset="utf-8">
+<title>{html.escape(title)}</title>
+<style>{EXPORT_STYLE}</style>
+</head>
+<body>
+<h1>{html.escape(title)}</h1>
+<p class="meta">{html.escape(meta)}</p>
+{question}
+{body}
+</body>
+</html>
+"""
+
+
+def init_export_worker():
+    # 작업 프로세스마다 화면 없이 동작하는 QGuiApplication 생성 (폰트/PDF 렌더링에 필요)
+    global export_app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    export_app = QGuiApplication.instance() or QGuiApplication([])
+
+
+def export_reading(reading_path, output_dir):
+    """보관된 풀이 하나를 HTML과 PDF로 내보내고 생성된 파일 경로 반환"""
+    with open(reading_path, encoding="utf-8") as f:
+        reading = json.load(f)
+
+    base_name = os.path.join(output_dir, os.path.splitext(os.path.basename(reading_path))[0])
+    html_text = reading_to_html(reading)
+
+    html_path = base_name + ".html"
+    with open(html_path, "w", encoding="utf-8") as f:
+        f.write(html_text)
+
+    # 화면에 띄우지 않는 QTextDocument로 PDF 렌더링
+    pdf_path = base_name + ".pdf"
+    document = QTextDocument()
+    document.setHtml(html_text)
+    writer = QPdfWriter(pdf_path)
+    writer.setPageSize(QPageSize(QPageSize.A4))
+    writer.setTitle(reading["name"])
+    document.print_(writer)
+
+    return [html_path, pdf_path]
+
+
+# 여러 풀이를 프로세스 풀에서 병렬로 내보내고 진행 상황을 시그널로 전달
+class ExportJob(QObject):
+    progress = pyqtSignal(int, int)  # 완료 수, 전체 수
+    finished = pyqtSignal(list, list)  # 생성된 파일 목록, 실패한 풀이 목록
+    future_done = pyqtSignal(str, object)  # 풀이 경로, 완료된 future
+
+    def __init__(self, reading_paths, output_dir, parent=None):
+        super().__init__(parent)
+        self.reading_paths = list(reading_paths)
+        self.output_dir = output_dir
+        self.done_count = 0
+        self.exported = []
+        self.failed = []
+        self.executor = None
+        # 완료 콜백은 어느 스레드에서든 호출될 수 있으므로 집계는 항상 메인 스레드에서
+        self.future_done.connect(self.on_done, Qt.QueuedConnection)
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        # Qt 상태를 물려받지 않도록 spawn 방식으로 작업 프로세스 생성
+        self.executor = ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=init_export_worker)
+        for path in self.reading_paths:
+            future = self.executor.submit(export_reading, path, self.output_dir)
+            future.add_done_callback(lambda future, path=path: self.future_done.emit(path, future))
+
+    def on_done(self, path, future):
+        if future.exception() is None:
+            self.exported.extend(future.result())
+        else:
+            self.failed.append(path)
+        self.done_count += 1
+        self.progress.emit(self.done_count, len(self.reading_paths))
+        if self.done_count == len(self.reading_paths):
+            self.executor.shutdown(wait=False)
+            self.finished.emit(self.exported, self.failed)
+
+
 class MudangGPT(QMainWindow):
     def __init__(self):
         super().__init__()
         self.settings = DEFAULT_SETTINGS.copy()
+        self.output_budget = OutputBudget()
         self.init_ui()
         self.client = None
         self.try_connect_api()
@@ -252,6 +697,7 @@ class MudangGPT(QMainWindow):
             }
         """)
         saju_layout.addWidget(self.saju_result)
+        self.saju_renderer = MarkdownRenderer(self.saju_result)
         
         self.saju_tab.setLayout(saju_layout)
         self.tabs.addTab(self.saju_tab, "사주팔자")
@@ -318,6 +764,7 @@ class MudangGPT(QMainWindow):
             }
         """)
         counsel_layout.addWidget(self.counsel_result)
+        self.counsel_renderer = MarkdownRenderer(self.counsel_result)
         
         self.counsel_tab.setLayout(counsel_layout)
         self.tabs.addTab(self.counsel_tab, "고민상담")
@@ -345,6 +792,23 @@ class MudangGPT(QMainWindow):
         self.prompt_edit_button.clicked.connect(self.open_prompt_editor)
         bottom_layout.addWidget(self.prompt_edit_button)
         
+        # 내보내기 버튼
+        self.export_button = QPushButton("풀이 내보내기")
+        self.export_button.setFont(QFont("Malgun Gothic", 10))
+        self.export_button.setMinimumHeight(35)
+        self.export_button.setStyleSheet("""
+            QPushButton {
+                background-color: #4A4A4A;
+                color: #E0E0E0;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #5A5A5A;
+            }
+        """)
+        self.export_button.clicked.connect(self.export_readings)
+        bottom_layout.addWidget(self.export_button)
+        
         bottom_layout.addStretch()
         
         # 상태 표시줄
@@ -360,6 +824,15 @@ class MudangGPT(QMainWindow):
         """선택된 성별 반환"""
         return "남성" if self.male_radio.isChecked() else "여성"
     
+    def get_user_info(self):
+        """풀이 보관에 사용할 사용자 정보 반환"""
+        return {
+            "name": self.name_input.text().strip(),
+            "gender": self.get_gender(),
+            "birthdate": self.birthdate_input.text().strip(),
+            "birthtime": self.time_input.text().strip(),
+        }
+    
     def validate_inputs(self):
         name = self.name_input.text().strip()
         birthdate = self.birthdate_input.text().strip()
@@ -388,6 +861,8 @@ class MudangGPT(QMainWindow):
         birthdate = self.birthdate_input.text().strip()
         birthtime = self.time_input.text().strip()
         gender = self.get_gender()
+        # 스트리밍 중 입력란이 바뀌어도 보관 기록은 이 풀이의 주인으로 남도록 미리 저장
+        user_info = self.get_user_info()
         
         # 현재 연도 가져오기
         current_year = datetime.now().year
@@ -421,20 +896,20 @@ class MudangGPT(QMainWindow):
             - 성별에 맞는 사주팔자 해석을 제공하세요
             """
             
-            response = self.client.messages.create(
-                model=AI_MODEL,
-                max_tokens=2000,
-                temperature=0.7,
-                system="당신은 한국의 전통 무당입니다. 사주팔자와 운세를 보는 전문가로서 신비롭고 직관적인 언어를 사용합니다.",
-                messages=[{"role": "user", "content": prompt}]
+            self.stream_reading(
+                "saju",
+                "당신은 한국의 전통 무당입니다. 사주팔자와 운세를 보는 전문가로서 신비롭고 직관적인 언어를 사용합니다.",
+                prompt,
+                self.saju_renderer
             )
             
-            self.saju_result.setText(response.content[0].text)
-            
         except Exception as e:
             self.saju_result.setText(f"분석 중 오류가 발생했습니다: {str(e)}")
             self.status_label.setText(f"API 오류: {str(e)}")
             self.status_label.setStyleSheet("color: #FF6347;")  # 오류 시 빨간색
+            return
+        
+        self.save_reading("saju", user_info, self.saju_renderer.buffer)
     
     def get_counsel(self):
         if not self.validate_inputs() or not self.client:
@@ -452,6 +927,8 @@ class MudangGPT(QMainWindow):
         birthdate = self.birthdate_input.text().strip()
         gender = self.get_gender()
         birthtime = self.time_input.text().strip()
+        # 스트리밍 중 입력란이 바뀌어도 보관 기록은 이 풀이의 주인으로 남도록 미리 저장
+        user_info = self.get_user_info()
         
         # 현재 연도 가져오기
         current_year = datetime.now().year
@@ -488,25 +965,130 @@ class MudangGPT(QMainWindow):
             - 성별을 고려한 맞춤형 조언을 제공하세요
             """
             
-            response = self.client.messages.create(
-                model=AI_MODEL,
-                max_tokens=2000,
-                temperature=0.7,
-                system="당신은 한국의 전통 무당입니다. 사주팔자를 보며 고민 상담을 해주는 전문가로서 신비롭고 직관적인 언어를 사용합니다.",
-                messages=[{"role": "user", "content": prompt}]
+            self.stream_reading(
+                "counsel",
+                "당신은 한국의 전통 무당입니다. 사주팔자를 보며 고민 상담을 해주는 전문가로서 신비롭고 직관적인 언어를 사용합니다.",
+                prompt,
+                self.counsel_renderer
             )
             
-            self.counsel_result.setText(response.content[0].text)
-            
         except Exception as e:
             self.counsel_result.setText(f"상담 중 오류가 발생했습니다: {str(e)}")
             self.status_label.setText(f"API 오류: {str(e)}")
             self.status_label.setStyleSheet("color: #FF6347;")  # 오류 시 빨간색
+            return
+        
+        self.save_reading("counsel", dict(user_info, worry=worry),
+                          self.counsel_renderer.buffer)
+    
+    def stream_reading(self, mode, system, prompt, renderer):
+        """출력 예산에 맞춰 응답을 스트리밍하고, max_tokens로 잘리면 이어서 생성"""
+        max_tokens = self.output_budget.max_tokens(mode)
+        messages = [{"role": "user", "content": prompt}]
+        output_tokens = 0
+        
+        # 스트리밍 중 processEvents로 버튼이 다시 눌려 요청이 겹치지 않도록 비활성화
+        self.set_reading_buttons_enabled(False)
+        try:
+            for attempt in range(MAX_CONTINUATIONS + 1):
+                # 스트리밍으로 받아 마크다운을 점진적으로 렌더링
+                with self.client.messages.stream(
+                    model=AI_MODEL,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    system=system,
+                    messages=messages
+                ) as stream:
+                    if attempt == 0:
+                        renderer.clear()
+                    for text in stream.text_stream:
+                        renderer.append(text)
+                        QApplication.processEvents()
+                    message = stream.get_final_message()
+                
+                output_tokens += message.usage.output_tokens
+                if message.stop_reason != "max_tokens":
+                    break
+                
+                # 지금까지의 답변을 assistant 메시지로 넘겨 이어서 생성
+                # (prefill 끝 공백은 허용되지 않고, 이어지는 조각이 공백을 다시 보내므로 buffer에서도 지움)
+                renderer.strip_trailing_whitespace()
+                messages = [
+                    {"role": "user", "content": prompt},
+                    {"role": "assistant", "content": renderer.buffer}
+                ]
+        finally:
+            self.set_reading_buttons_enabled(True)
+        
+        # 이어쓰기를 모두 쓰고도 잘렸으면 본문에 알림을 남김
+        cut_short = message.stop_reason == "max_tokens"
+        if cut_short:
+            renderer.append("\n\n*(답변이 너무 길어 뒷부분이 잘렸어요. 다시 시도해주세요.)*")
+        renderer.finish()
+        
+        # 이어쓰기까지 합친 전체 길이를 기록해 다음 예산에 반영
+        self.output_budget.record(mode, output_tokens, truncated=attempt > 0, cut_short=cut_short)
+        rate = self.output_budget.truncation_rate(mode)
+        cut_short_rate = self.output_budget.cut_short_rate(mode)
+        stats = f"max_tokens {max_tokens}, 잘림 비율 {rate:.1%}, 최종 잘림 {cut_short_rate:.1%}"
+        if cut_short:
+            self.status_label.setText(f"응답이 잘렸습니다 ({stats})")
+            self.status_label.setStyleSheet("color: #FFA500;")  # 경고 시 주황색
+        else:
+            self.status_label.setText(f"응답 완료 ({stats})")
+            self.status_label.setStyleSheet("color: #50C878;")  # 성공 시 초록색
+    
+    def save_reading(self, kind, info, text):
+        # 보관 실패는 이미 표시된 풀이를 지우지 않고 상태 표시줄에만 알림
+        try:
+            archive_reading(kind, info, text)
+        except OSError as e:
+            self.status_label.setText(f"풀이 보관 실패: {str(e)}")
+            self.status_label.setStyleSheet("color: #FF6347;")  # 오류 시 빨간색
+    
+    def set_reading_buttons_enabled(self, enabled):
+        self.saju_button.setEnabled(enabled)
+        self.counsel_button.setEnabled(enabled)
     
     def open_prompt_editor(self):
         # 프롬프트 편집기 창 열기
         self.editor = PromptEditor(self.settings, self)
         self.editor.show()
+    
+    def export_readings(self):
+        # 보관된 풀이 선택 (여러 개 선택 가능)
+        os.makedirs(READINGS_DIR, exist_ok=True)
+        reading_paths, _ = QFileDialog.getOpenFileNames(
+            self, "내보낼 풀이 선택", READINGS_DIR, "풀이 파일 (*.json)")
+        if not reading_paths:
+            return
+        
+        output_dir = QFileDialog.getExistingDirectory(self, "저장할 폴더 선택")
+        if not output_dir:
+            return
+        
+        # 백그라운드 프로세스에서 내보내는 동안 UI는 그대로 사용 가능
+        self.export_button.setEnabled(False)
+        self.export_job = ExportJob(reading_paths, output_dir, self)
+        self.export_job.progress.connect(self.on_export_progress)
+        self.export_job.finished.connect(self.on_export_finished)
+        self.export_job.start()
+        self.on_export_progress(0, len(reading_paths))
+    
+    def on_export_progress(self, done, total):
+        self.status_label.setText(f"내보내는 중... ({done}/{total})")
+        self.status_label.setStyleSheet("color: #FFA500;")  # 진행 중 주황색
+    
+    def on_export_finished(self, exported, failed):
+        self.export_button.setEnabled(True)
+        if failed:
+            self.status_label.setText(f"내보내기 완료 (실패 {len(failed)}건)")
+            self.status_label.setStyleSheet("color: #FF6347;")  # 오류 시 빨간색
+            QMessageBox.warning(self, "내보내기 오류",
+                                "다음 풀이를 내보내지 못했습니다:\n" + "\n".join(failed))
+        else:
+            self.status_label.setText(f"내보내기 완료 ({len(exported)}개 파일)")
+            self.status_label.setStyleSheet("color: #50C878;")  # 성공 시 초록색
 
 
 # 별도의 프롬프트 편집기 창